@@ -1,4 +1,5 @@
 import abc
+from typing import List
 
 
 class Broker:
@@ -12,6 +13,13 @@ class Broker:
         """
         raise NotImplementedError
 
+    def send_batch(self, schema: str, msgs: List[dict]):
+        """
+        send a batch of msgs to broker in one go
+        """
+        for msg in msgs:
+            self.send(schema=schema, msg=msg)
+
     @abc.abstractmethod
     def msgs(self, schema: str, last_msg_id, count: int = None, block: int = None):
         """
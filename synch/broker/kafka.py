@@ -6,7 +6,7 @@ from kafka import KafkaAdminClient, KafkaConsumer, KafkaProducer, TopicPartition
 from kafka.admin import NewTopic
 
 from synch.broker import Broker
-from synch.common import JsonEncoder, object_hook
+from synch.common import json_dumps, object_hook
 from synch.settings import Settings
 
 logger = logging.getLogger("synch.brokers.kafka")
@@ -23,7 +23,7 @@ class KafkaBroker(Broker):
         self.databases = Settings.get_source_db(alias).get("databases")
         self.producer = KafkaProducer(
             bootstrap_servers=self.servers,
-            value_serializer=lambda x: json.dumps(x, cls=JsonEncoder).encode(),
+            value_serializer=json_dumps,
             key_serializer=lambda x: x.encode(),
         )
         self._init_topic()
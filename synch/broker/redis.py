@@ -1,7 +1,8 @@
 import json
+from typing import List
 
 from synch.broker import Broker
-from synch.common import JsonEncoder, object_hook
+from synch.common import json_dumps, object_hook
 from synch.redis import Redis
 
 
@@ -17,11 +18,16 @@ class RedisBroker(Broker, Redis):
 
     def send(self, schema: str, msg: dict):
         self.master.xadd(
-            self._get_queue(schema),
-            {"msg": json.dumps(msg, cls=JsonEncoder)},
-            maxlen=self.queue_max_len,
+            self._get_queue(schema), {"msg": json_dumps(msg)}, maxlen=self.queue_max_len,
         )
 
+    def send_batch(self, schema: str, msgs: List[dict]):
+        queue = self._get_queue(schema)
+        with self.master.pipeline(transaction=False) as pipeline:
+            for msg in msgs:
+                pipeline.xadd(queue, {"msg": json_dumps(msg)}, maxlen=self.queue_max_len)
+            pipeline.execute()
+
     def msgs(self, schema: str, last_msg_id=None, count: int = None, block: int = None):
         if not last_msg_id:
             self.last_msg_id = self._get_last_msg_id(schema)
@@ -4,6 +4,7 @@ import logging
 from decimal import Decimal
 
 import dateutil.parser
+import orjson
 
 from synch.settings import Settings
 
@@ -16,18 +17,34 @@ CONVERTERS = {
 }
 
 
+def spec_type_default(obj):
+    """
+    encode datetime/date/decimal with _spec_type markers so object_hook can restore them
+    """
+    if isinstance(obj, datetime.datetime):
+        return {"val": obj.strftime("%Y-%m-%d %H:%M:%S"), "_spec_type": "datetime"}
+    elif isinstance(obj, datetime.date):
+        return {"val": obj.strftime("%Y-%m-%d"), "_spec_type": "date"}
+    elif isinstance(obj, Decimal):
+        return {"val": str(obj), "_spec_type": "decimal"}
+    raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+
+
 class JsonEncoder(json.JSONEncoder):
     def default(self, obj):
-        if isinstance(obj, datetime.datetime):
-            return {"val": obj.strftime("%Y-%m-%d %H:%M:%S"), "_spec_type": "datetime"}
-        elif isinstance(obj, datetime.date):
-            return {"val": obj.strftime("%Y-%m-%d"), "_spec_type": "date"}
-        elif isinstance(obj, Decimal):
-            return {"val": str(obj), "_spec_type": "decimal"}
-        else:
+        try:
+            return spec_type_default(obj)
+        except TypeError:
             return super().default(obj)
 
 
+def json_dumps(obj) -> bytes:
+    """
+    fast dumps with orjson, keeping the _spec_type round-trip of JsonEncoder
+    """
+    return orjson.dumps(obj, default=spec_type_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
 def object_hook(obj):
     _spec_type = obj.get("_spec_type")
     if not _spec_type:
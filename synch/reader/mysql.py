@@ -1,7 +1,11 @@
 import logging
+import re
+import socket
+import threading
 import time
+from queue import Empty, Queue
 from signal import Signals
-from typing import Callable, Generator, Tuple, Union
+from typing import Callable, Dict, Generator, List, Tuple, Union
 
 import MySQLdb
 from MySQLdb.cursors import DictCursor
@@ -13,9 +17,41 @@ from synch.broker import Broker
 from synch.convert import SqlConvert
 from synch.reader import Reader
 from synch.redis import RedisLogPos
+from synch.settings import Settings
 
 logger = logging.getLogger("synch.reader.mysql")
 
+_ALTER_RE = re.compile(r"\balter\b", re.IGNORECASE)
+
+
+class RowEvent:
+    """
+    one row change read from the binlog, slotted to keep per-row allocation cheap
+    """
+
+    __slots__ = ("table", "schema", "action", "values", "event_unixtime", "action_seq")
+
+    def __init__(self, table, schema, action, values, event_unixtime, action_seq):
+        self.table = table
+        self.schema = schema
+        self.action = action
+        self.values = values
+        self.event_unixtime = event_unixtime
+        self.action_seq = action_seq
+
+    def to_dict(self) -> dict:
+        """
+        convert to a plain dict at the serialization boundary
+        """
+        return {
+            "table": self.table,
+            "schema": self.schema,
+            "action": self.action,
+            "values": self.values,
+            "event_unixtime": self.event_unixtime,
+            "action_seq": self.action_seq,
+        }
+
 
 class Mysql(Reader):
     only_events = (DeleteRowsEvent, WriteRowsEvent, UpdateRowsEvent, QueryEvent)
@@ -37,12 +73,21 @@ class Mysql(Reader):
         self.init_binlog_file = source_db.get("init_binlog_file")
         self.init_binlog_pos = source_db.get("init_binlog_pos")
         self.server_id = source_db.get("server_id")
-        self.skip_dmls = source_db.get("skip_dmls") or []
-        self.skip_delete_tables = source_db.get("skip_delete_tables") or []
-        self.skip_update_tables = source_db.get("skip_update_tables") or []
+        self.skip_dmls = set(source_db.get("skip_dmls") or [])
+        self.skip_delete_tables = set(source_db.get("skip_delete_tables") or [])
+        self.skip_update_tables = set(source_db.get("skip_update_tables") or [])
         self.cursor = self.conn.cursor()
-        self.databases = list(map(lambda x: x.get("database"), source_db.get("databases")))
+        self.databases = [database.get("database") for database in source_db.get("databases")]
+        self._database_set = frozenset(self.databases)
         self.pos_handler = RedisLogPos(alias)
+        self._pending_pos = None
+        self._stop = False
+
+    def execute(self, sql, args=None):
+        # reuse the long-lived connection; ping with reconnect enabled instead
+        # of paying a fresh connect handshake when the server dropped it
+        self.conn.ping(True)
+        return super().execute(sql, args)
 
     def get_source_select_sql(self, schema: str, table: str, sign_column: str = None):
         select = "*"
@@ -65,19 +110,41 @@ class Mysql(Reader):
         :param table:
         :return:
         """
-        pri_sql = f"select COLUMN_NAME from information_schema.COLUMNS where TABLE_SCHEMA='{db}' and TABLE_NAME='{table}' and COLUMN_KEY='PRI'"
-        result = self.execute(pri_sql)
+        pri_sql = "select COLUMN_NAME from information_schema.COLUMNS where TABLE_SCHEMA=%s and TABLE_NAME=%s and COLUMN_KEY='PRI'"
+        result = self.execute(pri_sql, (db, table))
         if not result:
             return None
         if len(result) > 1:
             return tuple(map(lambda x: x.get("COLUMN_NAME"), result))
         return result[0]["COLUMN_NAME"]
 
+    def get_primary_keys(
+        self, tables: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Union[str, Tuple[str, ...]]]:
+        """
+        get pks of many tables with one information_schema query
+        :param tables: (schema, table) pairs
+        :return:
+        """
+        if not tables:
+            return {}
+        placeholders = ",".join(["(%s,%s)"] * len(tables))
+        pri_sql = (
+            "select TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME from information_schema.COLUMNS"
+            f" where COLUMN_KEY='PRI' and (TABLE_SCHEMA, TABLE_NAME) in ({placeholders})"
+        )
+        args = [item for pair in tables for item in pair]
+        pks = {}
+        for row in self.execute(pri_sql, args):
+            pks.setdefault((row["TABLE_SCHEMA"], row["TABLE_NAME"]), []).append(row["COLUMN_NAME"])
+        return {
+            key: tuple(columns) if len(columns) > 1 else columns[0] for key, columns in pks.items()
+        }
+
     def signal_handler(self, signum: Signals, handler: Callable):
         sig = Signals(signum)
-        log_f, log_p = self.pos_handler.get_log_pos()
-        logger.info(f"shutdown producer on {sig.name}, current position: {log_f}:{log_p}")
-        exit()
+        logger.info(f"shutdown producer on {sig.name}, wait to flush pending events...")
+        self._stop = True
 
     def start_sync(self, broker: Broker):
         log_file, log_pos = self.pos_handler.get_log_pos()
@@ -91,40 +158,129 @@ class Mysql(Reader):
         log_pos = int(log_pos)
         logger.info(f"mysql binlog: {log_file}:{log_pos}")
 
-        tables = []
+        tables = set()
         schema_tables = {}
         for database in self.source_db.get("databases"):
             database_name = database.get("database")
             for table in database.get("tables"):
                 table_name = table.get("table")
                 schema_tables.setdefault(database_name, []).append(table_name)
-                pk = self.get_primary_key(database_name, table_name)
-                if not pk or isinstance(pk, tuple):
-                    # skip delete and update when no pk and composite pk
-                    database_table = f"{database_name}.{table_name}"
-                    if database_table not in database_table:
-                        self.skip_delete_tables.append(database_table)
-                tables.append(table_name)
+                tables.add(table_name)
+        # pk info only decides whether deletes must be skipped, so don't look
+        # it up for tables the config already skips for both delete and update
+        pk_tables = [
+            (schema, table)
+            for schema, schema_table in schema_tables.items()
+            for table in schema_table
+            if not (
+                f"{schema}.{table}" in self.skip_delete_tables
+                and f"{schema}.{table}" in self.skip_update_tables
+            )
+        ]
+        pks = self.get_primary_keys(pk_tables)
+        for database_name, table_name in pk_tables:
+            pk = pks.get((database_name, table_name))
+            if not pk or isinstance(pk, tuple):
+                # skip delete and update when no pk and composite pk
+                self.skip_delete_tables.add(f"{database_name}.{table_name}")
+        self._allowed_tables = frozenset(
+            (schema, table)
+            for schema, schema_table in schema_tables.items()
+            for table in schema_table
+        )
         only_schemas = self.databases
-        only_tables = list(set(tables))
-        for schema, table, event, file, pos in self._binlog_reading(
-            only_tables=only_tables,
-            only_schemas=only_schemas,
-            log_file=log_file,
-            log_pos=log_pos,
-            server_id=self.server_id,
-            skip_dmls=self.skip_dmls,
-            skip_delete_tables=self.skip_delete_tables,
-            skip_update_tables=self.skip_update_tables,
-        ):
-            if table and table not in schema_tables.get(schema):
-                continue
-            event["values"] = self.deep_decode_dict(event["values"])
-            broker.send(msg=event, schema=schema)
-            self.pos_handler.set_log_pos_slave(file, pos)
-            logger.debug(f"send to queue success: key:{schema},event:{event}")
-            logger.debug(f"success set binlog pos:{file}:{pos}")
-            self.after_send(schema, table)
+        only_tables = list(tables)
+        # read binlog in a worker thread so broker and redis round-trips don't
+        # stall the stream; the bounded queue provides back-pressure and each
+        # item is the batch of events of one binlog_event
+        queue = Queue(maxsize=1000)
+        producer = threading.Thread(
+            target=self._produce,
+            args=(queue,),
+            kwargs=dict(
+                only_tables=only_tables,
+                only_schemas=only_schemas,
+                log_file=log_file,
+                log_pos=log_pos,
+                server_id=self.server_id,
+                skip_dmls=self.skip_dmls,
+                skip_delete_tables=self.skip_delete_tables,
+                skip_update_tables=self.skip_update_tables,
+            ),
+            daemon=True,
+        )
+        producer.start()
+        insert_interval = Settings.insert_interval()
+        insert_num = Settings.insert_num()
+        event_buffer = {}
+        buffer_len = 0
+        last_flush = time.time()
+        debug = logger.isEnabledFor(logging.DEBUG)
+        while True:
+            try:
+                item = queue.get(timeout=insert_interval)
+            except Empty:
+                item = None
+            if isinstance(item, BaseException):
+                raise item
+            if item is not None:
+                schema, table, events, file, pos = item
+                schema_buffer = event_buffer.setdefault(schema, [])
+                for event in events:
+                    event.values = self.deep_decode_dict(event.values)
+                    msg = event.to_dict()
+                    schema_buffer.append(msg)
+                    if debug:
+                        logger.debug("buffer event success: key:%s,event:%s", schema, msg)
+                    self.after_send(schema, table)
+                buffer_len += len(events)
+                self._pending_pos = (file, pos)
+            now = time.time()
+            if buffer_len and (
+                self._stop or buffer_len >= insert_num or now - last_flush >= insert_interval
+            ):
+                for buffer_schema, events in event_buffer.items():
+                    broker.send_batch(msgs=events, schema=buffer_schema)
+                # flush the position after the broker so a crash replays
+                # events instead of losing them
+                self.pos_handler.set_log_pos_slave(*self._pending_pos)
+                if debug:
+                    logger.debug("success set binlog pos:%s", self._pending_pos)
+                event_buffer = {}
+                buffer_len = 0
+                last_flush = now
+            if self._stop:
+                log_f, log_p = self.pos_handler.get_log_pos()
+                logger.info(f"shutdown producer success, current position: {log_f}:{log_p}")
+                break
+
+    @staticmethod
+    def _tune_stream_socket(stream: BinLogStreamReader) -> bool:
+        """
+        disable nagle and enlarge the receive buffer on the binlog stream socket,
+        the connection is only opened on the first fetch so this runs lazily
+        """
+        conn = getattr(stream, "_stream_connection", None)
+        sock = getattr(conn, "_sock", None)
+        if not sock:
+            return False
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+        except OSError as e:
+            logger.warning(f"tune binlog stream socket error: {e}")
+        return True
+
+    def _produce(self, queue: Queue, **kwargs):
+        """
+        run _binlog_reading in a worker thread, feeding the main thread
+        """
+        try:
+            for item in self._binlog_reading(**kwargs):
+                queue.put(item)
+        except Exception as e:
+            queue.put(e)
 
     def _binlog_reading(
         self,
@@ -152,71 +308,76 @@ class Mysql(Reader):
             fail_on_table_metadata_unavailable=True,
             slave_heartbeat=10,
         )
+        # (allowed, skip_delete, skip_update) per (schema, table), computed once on the first row
+        decision_cache = {}
+        tuned = False
         for binlog_event in stream:
+            if not tuned:
+                tuned = self._tune_stream_socket(stream)
             if isinstance(binlog_event, QueryEvent):
                 schema = binlog_event.schema.decode()
-                query = binlog_event.query.lower()
-                if "alter" not in query:
+                if schema not in self._database_set:
                     continue
-                table, convent_sql = SqlConvert.to_clickhouse(schema, query)
+                query = binlog_event.query
+                # cheap scan before lower(): most queries are not ALTER and
+                # lower-casing them would copy the whole statement
+                if not _ALTER_RE.search(query):
+                    continue
+                table, convent_sql = SqlConvert.to_clickhouse(schema, query.lower())
                 if not convent_sql:
                     continue
-                event = {
-                    "table": table,
-                    "schema": schema,
-                    "action": "query",
-                    "values": {"query": convent_sql},
-                    "event_unixtime": int(time.time() * 10 ** 6),
-                    "action_seq": 0,
-                }
-                yield schema, None, event, stream.log_file, stream.log_pos
+                event = RowEvent(
+                    table, schema, "query", {"query": convent_sql}, time.time_ns() // 1000, 0,
+                )
+                yield schema, None, [event], stream.log_file, stream.log_pos
             else:
                 schema = binlog_event.schema
                 table = binlog_event.table
-                skip_dml_table_name = f"{schema}.{table}"
-                for row in binlog_event.rows:
-                    if isinstance(binlog_event, WriteRowsEvent):
-                        event = {
-                            "table": table,
-                            "schema": schema,
-                            "action": "insert",
-                            "values": row["values"],
-                            "event_unixtime": int(time.time() * 10 ** 6),
-                            "action_seq": 2,
-                        }
-
-                    elif isinstance(binlog_event, UpdateRowsEvent):
-                        if "update" in skip_dmls or skip_dml_table_name in skip_update_tables:
-                            continue
-                        delete_event = {
-                            "table": table,
-                            "schema": schema,
-                            "action": "delete",
-                            "values": row["before_values"],
-                            "event_unixtime": int(time.time() * 10 ** 6),
-                            "action_seq": 1,
-                        }
-                        yield binlog_event.schema, binlog_event.table, delete_event, stream.log_file, stream.log_pos
-                        event = {
-                            "table": table,
-                            "schema": schema,
-                            "action": "insert",
-                            "values": row["after_values"],
-                            "event_unixtime": int(time.time() * 10 ** 6),
-                            "action_seq": 2,
-                        }
-
-                    elif isinstance(binlog_event, DeleteRowsEvent):
-                        if "delete" in skip_dmls or skip_dml_table_name in skip_delete_tables:
-                            continue
-                        event = {
-                            "table": table,
-                            "schema": schema,
-                            "action": "delete",
-                            "values": row["values"],
-                            "event_unixtime": int(time.time() * 10 ** 6),
-                            "action_seq": 1,
-                        }
-                    else:
-                        return
-                    yield binlog_event.schema, binlog_event.table, event, stream.log_file, stream.log_pos
+                decision = decision_cache.get((schema, table))
+                if decision is None:
+                    skip_dml_table_name = f"{schema}.{table}"
+                    decision = (
+                        (schema, table) in self._allowed_tables,
+                        "delete" in skip_dmls or skip_dml_table_name in skip_delete_tables,
+                        "update" in skip_dmls or skip_dml_table_name in skip_update_tables,
+                    )
+                    decision_cache[(schema, table)] = decision
+                allowed, skip_delete, skip_update = decision
+                if not allowed:
+                    continue
+                ts = time.time_ns() // 1000
+                log_file, log_pos = stream.log_file, stream.log_pos
+                if isinstance(binlog_event, WriteRowsEvent):
+                    events = list(self._iter_insert(binlog_event.rows, schema, table, ts))
+                elif isinstance(binlog_event, UpdateRowsEvent):
+                    if skip_update:
+                        continue
+                    events = list(self._iter_update(binlog_event.rows, schema, table, ts))
+                elif isinstance(binlog_event, DeleteRowsEvent):
+                    if skip_delete:
+                        continue
+                    events = list(self._iter_delete(binlog_event.rows, schema, table, ts))
+                else:
+                    continue
+                if events:
+                    yield schema, table, events, log_file, log_pos
+
+    @staticmethod
+    def _iter_insert(rows, schema, table, ts) -> Generator:
+        # bind the constructor to a local so the loop avoids a global lookup per row
+        row_event = RowEvent
+        for row in rows:
+            yield row_event(table, schema, "insert", row["values"], ts, 2)
+
+    @staticmethod
+    def _iter_update(rows, schema, table, ts) -> Generator:
+        row_event = RowEvent
+        for row in rows:
+            yield row_event(table, schema, "delete", row["before_values"], ts, 1)
+            yield row_event(table, schema, "insert", row["after_values"], ts, 2)
+
+    @staticmethod
+    def _iter_delete(rows, schema, table, ts) -> Generator:
+        row_event = RowEvent
+        for row in rows:
+            yield row_event(table, schema, "delete", row["values"], ts, 1)
@@ -59,12 +59,12 @@ class Postgres(Reader):
         return self._repl_conn.get(database).get("cursor")
 
     def get_primary_key(self, db: str, table: str) -> Union[None, str, Tuple[str, ...]]:
-        sql = f"""SELECT a.attname
+        sql = """SELECT a.attname
 FROM pg_index i
          JOIN pg_attribute a ON a.attrelid = i.indrelid
     AND a.attnum = ANY (i.indkey)
-WHERE i.indrelid = '{db}.public.{table}'::regclass AND i.indisprimary;"""
-        ret = self.execute(sql)
+WHERE i.indrelid = %s::regclass AND i.indisprimary;"""
+        ret = self.execute(sql, (f"{db}.public.{table}",))
         return ret[0][0]
 
     def _consumer(self, broker: Broker, database: str, msg: ReplicationMessage):
@@ -80,6 +80,9 @@ WHERE i.indrelid = '{db}.public.{table}'::regclass AND i.indisprimary;"""
         oldkeys = change.get("oldkeys")
         skip_dml_table_name = f"{database}.{table}"
         delete_event = event = None
+        # all changes of one replication message share the same transaction
+        # time, so sample the clock once
+        ts = time.time_ns() // 1000
         if kind == "update":
             values = dict(zip(columnnames, columnvalues))
             if (
@@ -91,7 +94,7 @@ WHERE i.indrelid = '{db}.public.{table}'::regclass AND i.indisprimary;"""
                     "schema": database,
                     "action": "delete",
                     "values": values,
-                    "event_unixtime": int(time.time() * 10 ** 6),
+                    "event_unixtime": ts,
                     "action_seq": 1,
                 }
                 event = {
@@ -99,7 +102,7 @@ WHERE i.indrelid = '{db}.public.{table}'::regclass AND i.indisprimary;"""
                     "schema": database,
                     "action": "insert",
                     "values": values,
-                    "event_unixtime": int(time.time() * 10 ** 6),
+                    "event_unixtime": ts,
                     "action_seq": 2,
                 }
         elif kind == "delete":
@@ -113,7 +116,7 @@ WHERE i.indrelid = '{db}.public.{table}'::regclass AND i.indisprimary;"""
                     "schema": database,
                     "action": "delete",
                     "values": values,
-                    "event_unixtime": int(time.time() * 10 ** 6),
+                    "event_unixtime": ts,
                     "action_seq": 1,
                 }
         elif kind == "insert":
@@ -123,7 +126,7 @@ WHERE i.indrelid = '{db}.public.{table}'::regclass AND i.indisprimary;"""
                 "schema": database,
                 "action": "insert",
                 "values": values,
-                "event_unixtime": int(time.time() * 10 ** 6),
+                "event_unixtime": ts,
                 "action_seq": 2,
             }
         else:
@@ -134,8 +137,9 @@ WHERE i.indrelid = '{db}.public.{table}'::regclass AND i.indisprimary;"""
         if event:
             broker.send(msg=event, schema=database)
         msg.cursor.send_feedback(flush_lsn=msg.data_start)
-        logger.debug(f"send to queue success: key:{database},event:{event}")
-        logger.debug(f"success flush lsn: {msg.data_start}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("send to queue success: key:%s,event:%s", database, event)
+            logger.debug("success flush lsn: %s", msg.data_start)
 
         with self.lock:
             self.lsn = msg.data_start
@@ -24,6 +24,7 @@ class Redis:
                 service_name=settings.get("sentinel_master"),
                 password=settings.get("password"),
                 decode_responses=True,
+                socket_keepalive=True,
             )
             self.master = sentinel.master_for(**kwargs)
             self.slave = sentinel.slave_for(**kwargs)
@@ -34,6 +35,7 @@ class Redis:
                 db=settings.get("db"),
                 password=settings.get("password"),
                 decode_responses=True,
+                socket_keepalive=True,
             )
             self.master = self.slave = redis.StrictRedis(connection_pool=pool)
 
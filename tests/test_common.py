@@ -0,0 +1,14 @@
+import datetime
+import json
+from decimal import Decimal
+
+from synch.common import json_dumps, object_hook
+
+
+def test_json_dumps_round_trip():
+    msg = {
+        "amount": Decimal("10.20"),
+        "created_at": datetime.datetime(2020, 1, 1, 12, 0, 0),
+    }
+    ret = json.loads(json_dumps(msg), object_hook=object_hook)
+    assert ret == msg